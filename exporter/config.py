@@ -1,5 +1,4 @@
 import os
-import sys
 
 
 INITIAL_LOG_CONFIG = {
@@ -11,6 +10,8 @@ INITIAL_LOG_CONFIG = {
 _default = dict(
     DOAJ_API_URL="https://doaj.org/api/",
     EXPORT_RUN_RETRIES=3,
+    EXPORT_MAX_WORKERS=8,
+    EXPORT_HTTP_CONCURRENCY=8,
 )
 
 
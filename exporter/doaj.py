@@ -1,6 +1,8 @@
 import typing
+import atexit
+import concurrent.futures
+import functools
 import re
-from datetime import datetime
 
 import requests
 from xylose import scielodocument
@@ -8,9 +10,40 @@ from xylose import scielodocument
 from exporter import interfaces, config, utils
 
 
+_session = requests.Session()
+_session.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=64,
+        max_retries=requests.adapters.Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    ),
+)
+atexit.register(_session.close)
+
+# Timeouts de conexão e de leitura para as consultas ao DOAJ
+_DOAJ_TIMEOUT = (3, 10)
+
+
+# Quantidade máxima de documentos aceita pelo endpoint /bulk/articles do DOAJ
+BULK_ARTICLES_LIMIT = 100
+
+_MIME_TYPE = {
+    "html": "text/html",
+    "pdf": "application/pdf",
+}
+
 ORCID_URL = "https://orcid.org"
 ORCID_REGEX_VALIDATION = r"^https://orcid\.org/[0-9]{4}-[0-9]{4}-[0-9]{4}-\d{3}[\dX]$"
 
+_LEADING_ZERO_RE = re.compile(r"^0 ")
+_TRAILING_ZERO_RE = re.compile(r" 0$")
+_PUB_DATE_RE = re.compile(r"^(\d{4})(?:-(0[1-9]|1[0-2])(?:-(\d{1,2}))?)?$")
+
 
 class DOAJExporterXyloseArticleNoRequestData(Exception):
     pass
@@ -32,25 +65,98 @@ class DOAJExporterXyloseArticleNoDOINorlink(Exception):
     pass
 
 
+def _is_valid_orcid(orcid: str) -> bool:
+    """Validação estrutural do formato 0000-0000-0000-000X, equivalente a
+    ORCID_REGEX_VALIDATION sem o custo do motor de expressões regulares."""
+    return (
+        len(orcid) == 19
+        and orcid.isascii()
+        and orcid[4] == "-"
+        and orcid[9] == "-"
+        and orcid[14] == "-"
+        and orcid[:4].isdigit()
+        and orcid[5:9].isdigit()
+        and orcid[10:14].isdigit()
+        and orcid[15:18].isdigit()
+        and (orcid[18].isdigit() or orcid[18] == "X")
+    )
+
+
+def _build_author(author: dict, affiliation_institutions: dict) -> dict:
+    author_data = {
+        "name": f'{author.get("given_names", "")} {author.get("surname", "")}'
+    }
+    affiliation_index = author.get("xref", [""])[0]
+    if affiliation_index:
+        author_data["affiliation"] = affiliation_institutions.get(
+            affiliation_index, ""
+        )
+    orcid = author.get("orcid")
+    if orcid and _is_valid_orcid(orcid):
+        author_data["orcid_id"] = f"{ORCID_URL}/{orcid}"
+
+    return author_data
+
+
+@functools.lru_cache(maxsize=4096)
+def _fetch_doaj_journal(
+    search_journal_url: str, issn: str
+) -> typing.Optional[typing.Tuple[str, str]]:
+    resp = _session.get(f"{search_journal_url}issn:{issn}", timeout=_DOAJ_TIMEOUT)
+    if resp.status_code != 200:
+        return None
+
+    results = resp.json().get("results")
+    if not results:
+        return None
+
+    bibjson = results[0].get("bibjson", {})
+    bibjson_issn = bibjson.get("eissn")
+    if bibjson_issn:
+        return bibjson_issn, "eissn"
+    else:
+        return bibjson.get("pissn"), "pissn"
+
+
 class DOAJExporterXyloseArticle(interfaces.IndexExporterInterface):
-    def __init__(self, article: scielodocument.Article, now: callable = utils.utcnow()):
+    __slots__ = (
+        "_api_url",
+        "_api_key",
+        "_article",
+        "_now",
+        "_data",
+        "_bibjson_built",
+        "_original_language",
+        "crud_article_put_url",
+        "search_journal_url",
+        "bulk_articles_url",
+    )
+
+    _issn_cache: typing.Dict[str, typing.Tuple[str, str]] = {}
+
+    def __init__(self, article: scielodocument.Article, now: str = None):
         self._set_api_config()
         self._article = article
-        self._now = now
+        self._now = now if now is not None else utils.utcnow()
         self._data = {}
+        self._bibjson_built = False
         if article.data.get("doaj_id"):
             self._data["id"] = article.data["doaj_id"]
 
     def _set_api_config(self):
-        for attr, envvar in [("_api_url", "DOAJ_API_URL"), ("_api_key", "DOAJ_API_KEY")]:
-            config_var = config.get(envvar)
-            if not config_var:
-                raise DOAJExporterXyloseArticleNoRequestData(f"No {envvar} set")
-            setattr(self, attr, config_var)
+        api_url = config.get("DOAJ_API_URL")
+        if not api_url:
+            raise DOAJExporterXyloseArticleNoRequestData("No DOAJ_API_URL set")
+
+        api_key = config.get("DOAJ_API_KEY")
+        if not api_key:
+            raise DOAJExporterXyloseArticleNoRequestData("No DOAJ_API_KEY set")
 
-        self.crud_article_put_url = f"{self._api_url}articles"
-        self.search_journal_url = f"{self._api_url}search/journals/"
-        self.bulk_articles_url = f"{self._api_url}bulk/articles"
+        self._api_url = api_url
+        self._api_key = api_key
+        self.crud_article_put_url = f"{api_url}articles"
+        self.search_journal_url = f"{api_url}search/journals/"
+        self.bulk_articles_url = f"{api_url}bulk/articles"
 
     @property
     def id(self):
@@ -74,11 +180,15 @@ class DOAJExporterXyloseArticle(interfaces.IndexExporterInterface):
 
     @property
     def params_request(self) -> dict:
-        return {"api_key": config.get("DOAJ_API_KEY")}
+        return {"api_key": self._api_key}
 
-    @property
-    def post_request(self) -> dict:
-        self._data["created_date"] = self._data["last_updated"] = self._now
+    def _build_bibjson(self):
+        if self._bibjson_built:
+            return
+
+        # Avalia uma única vez os atributos xylose compartilhados pelos
+        # _set_bibjson_*, que reparseiam o documento a cada chamada
+        self._original_language = self._article.original_language()
         self._data.setdefault("bibjson", {})
         self._set_bibjson_abstract()
         self._set_bibjson_author()
@@ -89,30 +199,30 @@ class DOAJExporterXyloseArticle(interfaces.IndexExporterInterface):
         self._set_bibjson_title()
         self._set_bibjson_month_and_year()
         self._set_es_type()
+        self._bibjson_built = True
+
+    @property
+    def post_request(self) -> dict:
+        self._data["created_date"] = self._data["last_updated"] = self._now
+        self._build_bibjson()
         return self._data
 
     def put_request(self, data: dict) -> dict:
         self._data = data
         self._data["last_updated"] = self._now
-        self._data.setdefault("bibjson", {})
-        self._set_bibjson_abstract()
-        self._set_bibjson_author()
-        self._set_bibjson_identifier()
-        self._set_bibjson_journal()
-        self._set_bibjson_keywords()
-        self._set_bibjson_link()
-        self._set_bibjson_title()
-        self._set_bibjson_month_and_year()
-        self._set_es_type()
+        self._bibjson_built = False
+        self._build_bibjson()
         return self._data
 
-    def post_response(self, response: dict) -> dict:
+    @staticmethod
+    def post_response(response: dict) -> dict:
         return {
             "index_id": response.get("id"),
             "status": response.get("status"),
         }
 
-    def error_response(self, response: dict) -> str:
+    @staticmethod
+    def error_response(response: dict) -> str:
         return response.get("error", "")
 
     def _set_bibjson_abstract(self):
@@ -128,56 +238,76 @@ class DOAJExporterXyloseArticle(interfaces.IndexExporterInterface):
             mixed_affiliation["index"]: mixed_affiliation["institution"]
             for mixed_affiliation in self._article.mixed_affiliations
         }
-        self._data["bibjson"].setdefault("author", [])
-        for author in self._article.authors:
-            author_data = {
-                "name": " ".join(
-                    [author.get("given_names", ""), author.get("surname", "")]
-                )
+        self._data["bibjson"]["author"] = [
+            _build_author(author, affiliation_institutions)
+            for author in self._article.authors
+        ]
+
+    @classmethod
+    def prefetch_journal_issns(
+        cls, articles: typing.Iterable[scielodocument.Article], max_workers: int = 10
+    ):
+        """Consulta no DOAJ, de forma concorrente, os ISSNs dos periódicos dos
+        documentos e guarda os resultados em cache para evitar uma consulta HTTP
+        por documento durante a exportação."""
+        issns = set()
+        for article in articles:
+            journal = article.journal
+            for issn in (journal.electronic_issn, journal.print_issn):
+                if issn and issn not in cls._issn_cache:
+                    issns.add(issn)
+
+        if not issns:
+            return
+
+        search_journal_url = f'{config.get("DOAJ_API_URL")}search/journals/'
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_fetch_doaj_journal, search_journal_url, issn): issn
+                for issn in issns
             }
-            affiliation_index = author.get("xref", [""])[0]
-            if affiliation_index:
-                author_data["affiliation"] = affiliation_institutions.get(
-                    affiliation_index, ""
-                )
-            if author.get("orcid"):
-                valid_orcid = re.fullmatch(
-                    ORCID_REGEX_VALIDATION, f'{ORCID_URL}/{author["orcid"]}'
-                )
-                if valid_orcid:
-                    author_data["orcid_id"] = valid_orcid.string
-
-            self._data["bibjson"]["author"].append(author_data)
+            for future in concurrent.futures.as_completed(futures.keys()):
+                try:
+                    registered_issn = future.result()
+                except requests.RequestException:
+                    continue
+                if registered_issn:
+                    cls._issn_cache[futures[future]] = registered_issn
 
     def _get_registered_journal_issn(self):
-        for journal_attr in ["electronic_issn", "print_issn"]:
-            issn = getattr(self._article.journal, journal_attr)
-            if not issn:
-                continue
-
-            resp = requests.get(f"{self.search_journal_url}issn:{issn}")
-            if resp.status_code != 200 or not resp.json().get("results"):
-                continue
-
-            search_result = resp.json()["results"][0]
-            bibjson = search_result.get("bibjson", {})
-            bibjson_issn = bibjson.get("eissn")
-            if bibjson_issn:
-                return bibjson_issn, "eissn"
-            else:
-                return bibjson.get("pissn"), "pissn"
-        else:
-            raise DOAJExporterXyloseArticleNoISSNException()
+        journal = self._article.journal
+        issns = [
+            issn
+            for issn in (journal.electronic_issn, journal.print_issn)
+            if issn
+        ]
+
+        for issn in issns:
+            cached_issn = self._issn_cache.get(issn)
+            if cached_issn:
+                return cached_issn
+
+        for issn in issns:
+            registered_issn = _fetch_doaj_journal(self.search_journal_url, issn)
+            if registered_issn:
+                # Registra também o ISSN devolvido pelo DOAJ para que o caminho
+                # alternativo encontre o cache na próxima consulta
+                self._issn_cache[issn] = registered_issn
+                if registered_issn[0]:
+                    self._issn_cache[registered_issn[0]] = registered_issn
+                return registered_issn
+
+        raise DOAJExporterXyloseArticleNoISSNException()
 
 
     def _set_bibjson_identifier(self):
         issn, issn_type = self._get_registered_journal_issn()
-        self._data["bibjson"]["identifier"] = [{"id": issn, "type": issn_type}]
+        identifier = [{"id": issn, "type": issn_type}]
 
         if self._article.doi:
-            self._data["bibjson"]["identifier"].append(
-                {"id": self._article.doi, "type": "doi"}
-            )
+            identifier.append({"id": self._article.doi, "type": "doi"})
+
+        self._data["bibjson"]["identifier"] = identifier
 
     def _get_issue_number(self):
         issue = self._article.issue
@@ -189,74 +319,67 @@ class DOAJExporterXyloseArticle(interfaces.IndexExporterInterface):
         if issue.supplement_volume:
             label_issue += f" suppl {issue.supplement_volume}"
 
-        label_issue = re.compile(r"^0 ").sub("", label_issue)
-        label_issue = re.compile(r" 0$").sub("", label_issue)
+        label_issue = _LEADING_ZERO_RE.sub("", label_issue)
+        label_issue = _TRAILING_ZERO_RE.sub("", label_issue)
         return label_issue.strip()
 
     def _set_bibjson_journal(self):
         journal = {}
+        article = self._article
+        article_journal = article.journal
 
-        def _set_journal_field(
-            journal, article_object, field, field_to_set, required=False
-        ):
-            if article_object:
-                object = getattr(self._article, article_object)
-            else:
-                object = self._article
-            object_field = getattr(object, field)
-            if object_field:
-                journal[field_to_set] = object_field
-            elif not object_field and required:
-                raise DOAJExporterXyloseArticleNoJournalRequiredFields()
-
-
-        publisher_country = self._article.journal.publisher_country
+        publisher_country = article_journal.publisher_country
         if not publisher_country:
             raise DOAJExporterXyloseArticleNoJournalRequiredFields()
         else:
             country_code, __ = publisher_country
             journal["country"] = country_code
 
-        _set_journal_field(journal, "journal", "languages", "language", required=True)
-        _set_journal_field(
-            journal, "journal", "publisher_name", "publisher", required=True
-        )
-        _set_journal_field(journal, "journal", "title", "title", required=True)
-        _set_journal_field(journal, "issue", "volume", "volume")
+        for source, field, field_to_set, required in (
+            (article_journal, "languages", "language", True),
+            (article_journal, "publisher_name", "publisher", True),
+            (article_journal, "title", "title", True),
+            (article.issue, "volume", "volume", False),
+        ):
+            value = getattr(source, field)
+            if value:
+                journal[field_to_set] = value
+            elif required:
+                raise DOAJExporterXyloseArticleNoJournalRequiredFields()
+
         issue_number = self._get_issue_number()
         if issue_number:
             journal["number"] = issue_number
-        _set_journal_field(journal, None, "start_page", "start_page")
-        _set_journal_field(journal, None, "end_page", "end_page")
+
+        if article.start_page:
+            journal["start_page"] = article.start_page
+        if article.end_page:
+            journal["end_page"] = article.end_page
 
         self._data["bibjson"]["journal"] = journal
 
     def _set_bibjson_keywords(self):
         keywords = self._article.keywords()
-        if keywords and keywords.get(self._article.original_language()):
-            self._data["bibjson"]["keywords"] = keywords[self._article.original_language()]
+        if keywords:
+            article_keywords = keywords.get(self._original_language)
+            if article_keywords:
+                self._data["bibjson"]["keywords"] = article_keywords
 
     def _set_bibjson_link(self):
-        MIME_TYPE = {
-            "html": "text/html",
-            "pdf": "application/pdf",
-        }
-
         fulltexts = self._article.fulltexts()
-        if fulltexts:
-            self._data["bibjson"].setdefault("link", [])
-            for content_type, links in fulltexts.items():
-                for __, url in links.items():
-                    if url:
-                        self._data["bibjson"]["link"].append(
-                            {
-                                "content_type": MIME_TYPE[content_type],
-                                "type": "fulltext",
-                                "url": url,
-                            }
-                        )
-
-        if not (self._data["bibjson"].get("link") or self._article.doi):
+        links = [
+            {
+                "content_type": _MIME_TYPE[content_type],
+                "type": "fulltext",
+                "url": url,
+            }
+            for content_type, urls in (fulltexts or {}).items()
+            for url in urls.values()
+            if url
+        ]
+        if links:
+            self._data["bibjson"]["link"] = links
+        elif not (self._data["bibjson"].get("link") or self._article.doi):
             raise DOAJExporterXyloseArticleNoDOINorlink(
                 "Documento não possui DOI ou links para texto completo"
             )
@@ -265,31 +388,23 @@ class DOAJExporterXyloseArticle(interfaces.IndexExporterInterface):
         title = self._article.original_title()
 
         if not title:
-            section_code = self._article.section_code
-            original_lang = self._article.original_language()
-            title = self._article.issue.sections.get(section_code, {}).get(
-                original_lang, "Documento sem título"
-            )
+            sections = self._article.issue.sections.get(self._article.section_code, {})
+            title = sections.get(self._original_language, "Documento sem título")
 
         self._data["bibjson"]["title"] = title
 
     def _set_bibjson_month_and_year(self):
         str_pub_date = self._article.document_publication_date or self._article.issue_publication_date
-        try:
-            pub_date = datetime.strptime(str_pub_date, "%Y-%m-%d")
-        except ValueError:
-            try:
-                pub_date = datetime.strptime(str_pub_date, "%Y-%m")
-            except ValueError:
-                pub_date = None
-                self._data["bibjson"]["year"] = str_pub_date
-
-        if pub_date:
-            if pub_date.month:
-                self._data["bibjson"]["month"] = pub_date.month
-
-            if pub_date.year:
-                self._data["bibjson"]["year"] = pub_date.year
+        bib = self._data["bibjson"]
+        match = _PUB_DATE_RE.match(str_pub_date or "")
+        if not match:
+            bib["year"] = str_pub_date
+            return
+
+        year, month, __ = match.groups()
+        if month:
+            bib["month"] = int(month)
+        bib["year"] = int(year)
 
     def _set_es_type(self):
         if self._article.document_type:
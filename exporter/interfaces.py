@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 
 
 class IndexExporterInterface(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def params_request(self) -> dict:
         pass
@@ -1,15 +1,19 @@
 import typing
+import atexit
+import collections
 import concurrent.futures
+import contextlib
+import threading
 import logging
 import argparse
 import pathlib
 import json
+import queue
 import datetime
 
 import tenacity
 import requests
 from requests.exceptions import HTTPError
-from tqdm import tqdm
 import articlemeta.client as articlemeta_client
 from xylose import scielodocument
 
@@ -19,6 +23,31 @@ from exporter import interfaces, doaj, config, utils
 logger = logging.getLogger(__name__)
 
 
+# Sessão compartilhada por todos os workers: o PoolManager do urllib3 é
+# thread-safe e reaproveita as conexões TCP/TLS com o índice
+session = requests.Session()
+session.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(
+        pool_connections=int(config.get("EXPORT_MAX_WORKERS")),
+        pool_maxsize=int(config.get("EXPORT_MAX_WORKERS")) * 2,
+    ),
+)
+# Headers comuns definidos uma única vez na sessão, em vez de montados e
+# mesclados a cada requisição
+session.headers.update({"User-Agent": "scielo_exports_doaj"})
+atexit.register(session.close)
+
+# Limita as requisições simultâneas ao índice independentemente do número de
+# workers, para que retries e pools maiores não pressionem a API
+_http_semaphore = threading.BoundedSemaphore(
+    int(config.get("EXPORT_HTTP_CONCURRENCY"))
+)
+
+# Número de tentativas resolvido uma única vez na carga do módulo
+_MAX_ATTEMPTS = int(config.get("EXPORT_RUN_RETRIES") or 3)
+
+
 class ArticleMetaDocumentNotFound(Exception):
     pass
 
@@ -75,11 +104,20 @@ class AMClient:
 class ExporterAdapterMixin:
 
     @tenacity.retry(
-        wait=tenacity.wait_exponential(),
-        stop=tenacity.stop_after_attempt(config.get("EXPORT_RUN_RETRIES")),
-        retry=tenacity.retry_if_exception_type(
-            (requests.ConnectionError, requests.Timeout),
+        wait=tenacity.wait_random_exponential(multiplier=1, max=30),
+        stop=tenacity.stop_after_attempt(_MAX_ATTEMPTS),
+        retry=(
+            tenacity.retry_if_exception_type(
+                (requests.ConnectionError, requests.Timeout),
+            )
+            | tenacity.retry_if_result(
+                lambda resp: getattr(resp, "status_code", None)
+                in (429, 502, 503, 504)
+            )
         ),
+        # Esgotadas as tentativas, devolve a última resposta (ou relança a
+        # exceção) para que o tratamento de erro de cada comando se aplique
+        retry_error_callback=lambda retry_state: retry_state.outcome.result(),
     )
     def _send_http_request(
         self, request_method: callable, url: str, params: json = None, json: json = None
@@ -90,7 +128,8 @@ class ExporterAdapterMixin:
             kwargs["params"] = params
         if json:
             kwargs["json"] = json
-        return request_method(url=url, **kwargs)
+        with _http_semaphore:
+            return request_method(url=url, **kwargs)
 
     def command_function(self):
         return self._command_function()
@@ -101,22 +140,27 @@ class XyloseArticleExporterAdapter(
 ):
     index_exporter: interfaces.IndexExporterInterface
 
+    # Tabela de despacho resolvida uma vez por instância, sem a cadeia de
+    # if/elif por comando
+    _COMMANDS = {
+        "export": "_export",
+        "update": "_update",
+        "get": "_get",
+        "delete": "_delete",
+    }
+
     def __init__(self, index: str, command: str, article: scielodocument.Article):
         if index == "doaj":
             self.index_exporter = doaj.DOAJExporterXyloseArticle(article)
         else:
             raise InvalidExporterInitData(f"Index informado inválido: {index}")
 
-        if command == "export":
-            self._command_function = self._export
-        elif command == "update":
-            self._command_function = self._update
-        elif command == "get":
-            self._command_function = self._get
-        elif command == "delete":
-            self._command_function = self._delete
-        else:
-            raise InvalidExporterInitData(f"Comando informado inválido: {command}")
+        try:
+            self._command_function = getattr(self, self._COMMANDS[command])
+        except KeyError:
+            raise InvalidExporterInitData(
+                f"Comando informado inválido: {command}"
+            ) from None
 
         self.index = index
         self._pid = article.data.get("code", "")
@@ -139,13 +183,14 @@ class XyloseArticleExporterAdapter(
         return self.index_exporter.error_response(response)
 
     def _export(self):
+        post_request = self.post_request
         resp = self._send_http_request(
-            requests.post,
+            session.post,
             self.index_exporter.crud_article_put_url,
             self.params_request,
-            self.post_request,
+            post_request,
         )
-        logger.debug("Dados enviados: %s", self.post_request)
+        logger.debug("Dados enviados: %s", post_request)
         try:
             resp.raise_for_status()
         except HTTPError as exc:
@@ -162,7 +207,7 @@ class XyloseArticleExporterAdapter(
 
     def _update(self):
         get_resp = self._send_http_request(
-            requests.get,
+            session.get,
             self.index_exporter.crud_article_url,
             self.params_request,
         )
@@ -175,7 +220,7 @@ class XyloseArticleExporterAdapter(
         else:
             put_req = self.put_request(get_resp.json())
             put_resp = self._send_http_request(
-                requests.put,
+                session.put,
                 self.index_exporter.crud_article_url,
                 self.params_request,
                 put_req,
@@ -195,7 +240,7 @@ class XyloseArticleExporterAdapter(
 
     def _get(self):
         get_resp = self._send_http_request(
-            requests.get,
+            session.get,
             self.index_exporter.crud_article_url,
             self.params_request,
         )
@@ -212,7 +257,7 @@ class XyloseArticleExporterAdapter(
 
     def _delete(self):
         delete_resp = self._send_http_request(
-            requests.delete,
+            session.delete,
             self.index_exporter.crud_article_url,
             self.params_request,
         )
@@ -233,103 +278,130 @@ class XyloseArticlesListExporterAdapter(
 ):
     index_exporters: typing.List[interfaces.IndexExporterInterface]
 
+    _COMMANDS = {"export": "_export", "delete": "_delete"}
+
     def __init__(
-        self, index: str, command: str, articles: typing.Set[scielodocument.Article]
+        self,
+        index: str,
+        command: str,
+        articles: typing.Iterable[scielodocument.Article],
+        batch_size: int = None,
     ):
         if index == "doaj":
+            articles = list(articles)
+            if command == "export":
+                # A deleção envia apenas os IDs DOAJ dos artigos; a pré-busca
+                # de ISSNs só é necessária para montar o payload de exportação
+                doaj.DOAJExporterXyloseArticle.prefetch_journal_issns(articles)
+            batch_now = utils.utcnow()
+            # Listas paralelas: evita um dicionário {pid, exporter} por
+            # artigo nos laços que montam os payloads em lote
+            self._pids = [article.data["code"] for article in articles]
             self.index_exporters = [
-                {
-                    "pid": article.data["code"],
-                    "index_exporter": doaj.DOAJExporterXyloseArticle(article)
-                }
+                doaj.DOAJExporterXyloseArticle(article, now=batch_now)
                 for article in articles
             ]
-            self.bulk_articles_url = self.index_exporters[0]["index_exporter"].\
-                bulk_articles_url
+            self.bulk_articles_url = self.index_exporters[0].bulk_articles_url
         else:
             raise InvalidExporterInitData(f"Index informado inválido: {index}")
 
-        if command == "export":
-            self._command_function = self._export
-        elif command == "delete":
-            self._command_function = self._delete
-        else:
-            raise InvalidExporterInitData(f"Comando informado inválido: {command}")
+        try:
+            self._command_function = getattr(self, self._COMMANDS[command])
+        except KeyError:
+            raise InvalidExporterInitData(
+                f"Comando informado inválido: {command}"
+            ) from None
 
         self.index = index
+        self._batch_size = batch_size or doaj.BULK_ARTICLES_LIMIT
+        # Payloads montados uma única vez por lote, na primeira leitura
+        self._params_request = self.index_exporters[0].params_request
+        self._post_request = None
+        self._delete_request = None
 
     @property
     def params_request(self) -> dict:
-        return self.index_exporters[0]["index_exporter"].params_request
+        return self._params_request
 
     @property
     def post_request(self) -> dict:
-        return [
-            item["index_exporter"].post_request
-            for item in self.index_exporters
-        ]
+        if self._post_request is None:
+            self._post_request = [
+                exporter.post_request for exporter in self.index_exporters
+            ]
+        return self._post_request
 
     @property
     def delete_request(self) -> dict:
-        return [
-            item["index_exporter"].id
-            for item in self.index_exporters
-        ]
+        if self._delete_request is None:
+            self._delete_request = [
+                exporter.id for exporter in self.index_exporters
+            ]
+        return self._delete_request
 
     def put_request(self, data: dict) -> dict:
         pass
 
     def post_response(self, response: dict) -> dict:
         resp = []
-        for item, resp_article in zip(self.index_exporters, response):
-            new_resp_article = item["index_exporter"].post_response(resp_article)
-            new_resp_article["pid"] = item["pid"]
+        for exporter, pid, resp_article in zip(
+            self.index_exporters, self._pids, response
+        ):
+            new_resp_article = exporter.post_response(resp_article)
+            new_resp_article["pid"] = pid
             resp.append(new_resp_article)
         return resp
 
     def error_response(self, response: dict) -> dict:
-        return self.index_exporters[0]["index_exporter"].error_response(response)
+        return self.index_exporters[0].error_response(response)
 
     def _export(self) -> dict:
-        resp = self._send_http_request(
-            requests.post,
-            self.bulk_articles_url,
-            self.params_request,
-            self.post_request,
-        )
-        try:
-            resp.raise_for_status()
-        except HTTPError as exc:
-            error_response = ""
-            if resp.status_code == 400:
-                error_response = " " + self.error_response(resp.json())
-            exc_msg = f"Erro na exportação ao {self.index}: {exc}.{error_response}"
-            raise IndexExporterHTTPError(exc_msg)
-        else:
-            export_result = self.post_response(resp.json())
-            logger.debug("Resultado do export: %s", export_result)
-            return export_result
+        post_request = self.post_request
+        responses = []
+        for start in range(0, len(post_request), self._batch_size):
+            resp = self._send_http_request(
+                session.post,
+                self.bulk_articles_url,
+                self.params_request,
+                post_request[start:start + self._batch_size],
+            )
+            try:
+                resp.raise_for_status()
+            except HTTPError as exc:
+                error_response = ""
+                if resp.status_code == 400:
+                    error_response = " " + self.error_response(resp.json())
+                exc_msg = f"Erro na exportação ao {self.index}: {exc}.{error_response}"
+                raise IndexExporterHTTPError(exc_msg)
+            else:
+                responses.extend(resp.json())
+
+        export_result = self.post_response(responses)
+        logger.debug("Resultado do export: %s", export_result)
+        return export_result
 
     def _delete(self):
-        resp = self._send_http_request(
-            requests.delete,
-            self.bulk_articles_url,
-            self.params_request,
-            self.delete_request,
-        )
-        try:
-            resp.raise_for_status()
-        except HTTPError as exc:
-            error_response = self.error_response(resp.json())
-            exc_msg = f"Erro ao deletar no {self.index}: {exc}. {error_response}"
-            raise IndexExporterHTTPError(exc_msg)
-        else:
-            delete_result = [
-                { "pid": item["pid"], "status": "DELETED" }
-                for item in self.index_exporters
-            ]
-            logger.debug("Resultado da deleção: %s", delete_result)
-            return delete_result
+        delete_request = self.delete_request
+        for start in range(0, len(delete_request), self._batch_size):
+            resp = self._send_http_request(
+                session.delete,
+                self.bulk_articles_url,
+                self.params_request,
+                delete_request[start:start + self._batch_size],
+            )
+            try:
+                resp.raise_for_status()
+            except HTTPError as exc:
+                error_response = self.error_response(resp.json())
+                exc_msg = f"Erro ao deletar no {self.index}: {exc}. {error_response}"
+                raise IndexExporterHTTPError(exc_msg)
+
+        delete_result = [
+            { "pid": pid, "status": "DELETED" }
+            for pid in self._pids
+        ]
+        logger.debug("Resultado da deleção: %s", delete_result)
+        return delete_result
 
 
 class PoisonPill:
@@ -354,27 +426,52 @@ class JobExecutor:
         self.exception_callback = exception_callback
         self.update_bar = update_bar
 
-    def run(self, jobs: list = []):
+    def run(self, jobs: typing.Iterable[dict] = ()):
+        jobs = iter(jobs)
+        # Callbacks pré-ligados a locais: evita três LOAD_ATTR por job no
+        # laço de conclusão
+        success_callback = self.success_callback
+        exception_callback = self.exception_callback
+        update_bar = self.update_bar
         with self.executor(max_workers=self.max_workers) as _executor:
-            futures = {
-                _executor.submit(self.func, **job, poison_pill=self.poison_pill): job
-                for job in jobs
-            }
+            # Mantém no máximo 4 * max_workers futures em aberto: os jobs são
+            # submetidos conforme os anteriores completam, em vez de todos de
+            # uma vez, limitando o consumo de memória em execuções grandes
+            pending = set()
+
+            def submit_pending():
+                for job in jobs:
+                    future = _executor.submit(
+                        self.func, **job, poison_pill=self.poison_pill
+                    )
+                    future.job = job
+                    pending.add(future)
+                    if len(pending) >= 4 * self.max_workers:
+                        break
 
             try:
-                for future in concurrent.futures.as_completed(futures):
-                    job = futures[future]
-                    try:
-                        result = future.result()
-                    except Exception as exc:
-                        self.exception_callback(exc, job)
-                    else:
-                        self.success_callback(result, job)
-                    finally:
-                        self.update_bar()
+                submit_pending()
+                while pending:
+                    done, pending = concurrent.futures.wait(
+                        pending,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        try:
+                            result = future.result()
+                        except Exception as exc:
+                            exception_callback(exc, future.job)
+                        else:
+                            success_callback(result, future.job)
+                        finally:
+                            update_bar()
+                    submit_pending()
             except KeyboardInterrupt:
                 logging.info("Finalizando...")
-                self.poisoned = True
+                self.poison_pill.poisoned = True
+                for future in pending:
+                    future.cancel()
+                _executor.shutdown(wait=False)
                 raise
 
 
@@ -395,6 +492,11 @@ def process_document(
     if not document or not document.data:
         raise ArticleMetaDocumentNotFound()
 
+    # Reavalia o poison pill após a busca para não enviar ao índice um
+    # documento obtido enquanto a execução estava sendo interrompida
+    if poison_pill.poisoned:
+        return
+
     if managed_issns:
         doc_issns = utils.extract_issns_from_document(document)
 
@@ -423,40 +525,72 @@ def process_extracted_documents(
     output_path:pathlib.Path,
     pids_by_collection:typing.Dict[str, list],
     managed_issns:set,
+    max_workers:int = None,
 ) -> None:
 
-    jobs = [
-        {
-            "get_document": get_document,
-            "index": index,
-            "index_command": index_command,
-            "collection": collection,
-            "pid": pid,
-            "managed_issns": managed_issns,
-        }
+    # Campos comuns a todos os jobs e PIDs deduplicados preservando a ordem,
+    # para não buscar nem exportar o mesmo documento mais de uma vez
+    base_job = {
+        "get_document": get_document,
+        "index": index,
+        "index_command": index_command,
+        "managed_issns": managed_issns,
+    }
+    # Cada coleção é deduplicada uma vez para o total da barra de progresso;
+    # os jobs em si são gerados sob demanda, conforme o executor os consome
+    unique_pids_by_collection = {
+        collection: dict.fromkeys(pids)
         for collection, pids in pids_by_collection.items()
+    }
+    total_jobs = sum(len(pids) for pids in unique_pids_by_collection.values())
+    jobs = (
+        {**base_job, "collection": collection, "pid": pid}
+        for collection, pids in unique_pids_by_collection.items()
         for pid in pids
-    ]
+    )
 
-    with tqdm(total=len(jobs), ascii=True) as pbar:
+    # Import adiado: a barra de progresso só é necessária durante a exportação
+    # e o import no topo do módulo atrasava a carga da CLI
+    from tqdm import tqdm
+
+    output_is_dir = output_path.is_dir()
+    write_lock = threading.Lock()
+
+    with contextlib.ExitStack() as stack:
+        pbar = stack.enter_context(
+            tqdm(
+                total=total_jobs,
+                ascii=True,
+                miniters=max(1, total_jobs // 200),
+                mininterval=0.5,
+                smoothing=0,
+            )
+        )
+        if not output_is_dir:
+            # Mantém um único file handle aberto durante toda a execução em vez
+            # de reabrir o arquivo a cada resultado
+            output_fp = stack.enter_context(
+                output_path.open("a", encoding="utf-8", buffering=1 << 20)
+            )
 
         def update_bar(pbar=pbar):
             pbar.update(1)
 
         def write_result(result, job, path:pathlib.Path=output_path):
-            if path.is_dir():
+            if output_is_dir:
                 file_path = path / f'{job["pid"]}.json'
                 logger.debug('Gravando resultado em arquivo %s: "%s"', file_path)
                 with file_path.open("w", encoding="utf-8") as fp:
-                    json.dump(result, fp)
+                    json.dump(result, fp, separators=(",", ":"))
             else:
                 logger.debug('Gravando resultado em arquivo %s: "%s"', path, result)
-                with path.open("a", encoding="utf-8") as fp:
-                    fp.write(json.dumps(result) + "\n")
+                line = json.dumps(result, separators=(",", ":"))
+                with write_lock:
+                    output_fp.write(line + "\n")
 
         executor = JobExecutor(
             process_document,
-            max_workers=2,
+            max_workers=max_workers or int(config.get("EXPORT_MAX_WORKERS")),
             success_callback=write_result,
             exception_callback=log_exception,
             update_bar=update_bar,
@@ -499,41 +633,120 @@ def process_documents_in_bulk(
     output_path:pathlib.Path,
     managed_issns:set,
     pids_by_collection:typing.Dict[str, list],
+    batch_size:int = None,
+    max_workers:int = None,
 ) -> None:
-    jobs = [
+    total_jobs = sum(len(pids) for pids in pids_by_collection.values())
+    jobs = (
         { "get_document": get_document, "collection": collection, "pid": pid, "managed_issns": managed_issns }
         for collection, pids in pids_by_collection.items()
         for pid in pids
-    ]
+    )
 
-    documents = set()
-    with tqdm(total=len(jobs), ascii=True) as pbar:
+    from tqdm import tqdm
+
+    adapter_kwargs = {}
+    if batch_size:
+        adapter_kwargs["batch_size"] = batch_size
+    batch_limit = batch_size or doaj.BULK_ARTICLES_LIMIT
+
+    # Pipeline produtor-consumidor: enquanto os workers buscam documentos no
+    # ArticleMeta, lotes completos vão sendo enviados ao índice por uma
+    # thread consumidora, em vez de esperar todas as buscas terminarem
+    batch_queue = queue.Queue(maxsize=2)
+    results = []
+    consumer_errors = []
+
+    def consume_batches():
+        while True:
+            batch = batch_queue.get()
+            if batch is None:
+                break
+            if consumer_errors:
+                # Após uma falha apenas drena a fila, sem exportar, para não
+                # bloquear a produtora
+                continue
+            try:
+                articles_adapter = XyloseArticlesListExporterAdapter(
+                    index, index_command, batch, **adapter_kwargs
+                )
+                results.extend(articles_adapter.command_function())
+            except Exception as exc:
+                consumer_errors.append(exc)
+
+    consumer = threading.Thread(target=consume_batches)
+    consumer.start()
+
+    # Dicionário chaveado pelo PID: fetches repetidos do mesmo documento
+    # resultam em uma única entrada no lote
+    documents = {}
+    documents_lock = threading.Lock()
+
+    def enqueue_full_batch():
+        with documents_lock:
+            if len(documents) < batch_limit:
+                return
+            batch = set(documents.values())
+            documents.clear()
+        batch_queue.put(batch)
+
+    with tqdm(
+        total=total_jobs,
+        ascii=True,
+        miniters=max(1, total_jobs // 200),
+        mininterval=0.5,
+        smoothing=0,
+    ) as pbar:
 
         def update_bar(pbar=pbar):
             pbar.update(1)
 
         def write_result(result, job, path:pathlib.Path=output_path):
-            documents.add(result)
+            # Uma falha na consumidora envenena a execução: os workers param
+            # de buscar documentos em vez de alimentar lotes que não serão
+            # mais exportados
+            if consumer_errors:
+                executor.poison_pill.poisoned = True
+                return
+            with documents_lock:
+                documents[result.data["code"]] = result
+            enqueue_full_batch()
 
         executor = JobExecutor(
             execute_get_document,
-            max_workers=2,
+            max_workers=max_workers or int(config.get("EXPORT_MAX_WORKERS")),
             success_callback=write_result,
             exception_callback=log_exception,
             update_bar=update_bar,
         )
-        executor.run(jobs)
-
-    if documents:
-        articles_adapter = XyloseArticlesListExporterAdapter(
-            index, index_command, documents
-        )
-        ret = articles_adapter.command_function()
-
+        try:
+            executor.run(jobs)
+        except BaseException:
+            # Interrupção ou erro na produção: descarta o lote parcial para
+            # não disparar exportações extras durante o encerramento
+            with documents_lock:
+                documents.clear()
+            raise
+        finally:
+            # Descarrega o lote parcial restante e encerra a consumidora
+            if documents:
+                batch_queue.put(set(documents.values()))
+                documents.clear()
+            batch_queue.put(None)
+            consumer.join()
+
+    # Grava antes de propagar erros da consumidora: lotes já aceitos pelo
+    # índice ficam registrados localmente mesmo em execuções com falha
+    if results:
         logger.debug('Gravando resultado em arquivo %s', output_path)
         with output_path.open("w", encoding="utf-8") as fp:
-            for line in ret:
-                fp.write(json.dumps(line) + "\n")
+            fp.writelines(
+                json.dumps(line, separators=(",", ":")) + "\n"
+                for line in results
+            )
+
+    if consumer_errors:
+        raise consumer_errors[0]
 
     return
 
@@ -543,12 +756,13 @@ def articlemeta_parser(sargs):
 
     class FutureDateAction(argparse.Action):
         def __call__(self, parser, namespace, values, option_string=None):
-            date = datetime.datetime.strptime(values, "%d-%m-%Y")
+            # Guarda o datetime já convertido para não reinterpretar a data
+            # mais adiante em main_exporter
+            date = utils.get_valid_datetime(values)
             today = datetime.datetime.today()
             if date > today:
-                setattr(namespace, self.dest, today.strftime("%d-%m-%Y"))
-            else:
-                setattr(namespace, self.dest, values)
+                date = datetime.datetime(today.year, today.month, today.day)
+            setattr(namespace, self.dest, date)
 
 
     parser = argparse.ArgumentParser(add_help=False)
@@ -616,6 +830,11 @@ def main_exporter(sargs):
         required=True,
         help="Caminho para arquivo de resultado da exportação",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Número de workers para processamento em paralelo",
+    )
 
     subparsers = parser.add_subparsers(title="Index", dest="index")
 
@@ -630,6 +849,12 @@ def main_exporter(sargs):
     doaj_export_parser.add_argument(
         "--bulk", action="store_true", help="Exporta documentos em lote"
     )
+    doaj_export_parser.add_argument(
+        "--batch-size",
+        type=int,
+        dest="batch_size",
+        help="Quantidade de documentos por requisição em lote",
+    )
 
     doaj_subparsers.add_parser(
         "update", help="Atualiza documentos", parents=[articlemeta_parser(sargs)],
@@ -645,6 +870,12 @@ def main_exporter(sargs):
     doaj_delete_parser.add_argument(
         "--bulk", action="store_true", help="Deleta documentos em lote"
     )
+    doaj_delete_parser.add_argument(
+        "--batch-size",
+        type=int,
+        dest="batch_size",
+        help="Quantidade de documentos por requisição em lote",
+    )
 
     args = parser.parse_args(sargs)
 
@@ -664,6 +895,8 @@ def main_exporter(sargs):
         "index_command": args.doaj_command,
         "output_path": args.output,
     }
+    if args.workers:
+        params["max_workers"] = args.workers
 
     # Load managed ISSNs
     if args.issns:
@@ -695,26 +928,32 @@ def main_exporter(sargs):
                 "Coleção é obrigatória para exportação de lista de PIDs"
             )
 
-        params["pids_by_collection"] = {
-            args.collection: [pid for pid in args.pids.read_text().split("\n") if pid]
-        }
+        # Lê o arquivo linha a linha para não carregar listas de PIDs muito
+        # grandes inteiras em memória
+        with args.pids.open() as pids_file:
+            params["pids_by_collection"] = {
+                args.collection: [line.strip() for line in pids_file if line.strip()]
+            }
     else:
         filter = {}
         if args.collection:
             filter["collection"] = args.collection
         if args.from_date:
-            filter["from_date"] = utils.get_valid_datetime(args.from_date)
+            filter["from_date"] = args.from_date
         if args.until_date:
-            filter["until_date"] = utils.get_valid_datetime(args.until_date)
+            filter["until_date"] = args.until_date
 
-        params["pids_by_collection"] = {}
         docs = am_client.documents_identifiers(**filter)
-    
+
+        # defaultdict evita o par setdefault + lookup por documento
+        pids_by_collection = collections.defaultdict(list)
         for doc in docs or []:
-            params["pids_by_collection"].setdefault(doc["collection"], [])
-            params["pids_by_collection"][doc["collection"]].append(doc["code"])
+            pids_by_collection[doc["collection"]].append(doc["code"])
+        params["pids_by_collection"] = dict(pids_by_collection)
 
     if getattr(args, "bulk", None):
+        if getattr(args, "batch_size", None):
+            params["batch_size"] = args.batch_size
         process_documents_in_bulk(**params)
     else:
         process_extracted_documents(**params)
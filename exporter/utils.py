@@ -1,3 +1,5 @@
+import functools
+
 from datetime import datetime
 from pathlib import Path
 from xylose import scielodocument
@@ -8,9 +10,10 @@ class ISSNFileError(Exception):
 
 
 def utcnow():
-    return str(datetime.utcnow().isoformat() + "Z")
+    return f"{datetime.utcnow().isoformat()}Z"
 
 
+@functools.lru_cache(maxsize=None)
 def get_valid_datetime(strdate: str) -> datetime:
     try:
         date = datetime.strptime(strdate, "%d-%m-%Y")
@@ -21,7 +24,7 @@ def get_valid_datetime(strdate: str) -> datetime:
 
 
 def is_valid_issn(issn: str):
-    if len(issn) == 9 and '-' in issn[4]:
+    if len(issn) == 9 and issn[4] == '-':
         return True
     return False
 
@@ -29,7 +32,8 @@ def is_valid_issn(issn: str):
 def extract_issns_from_file(issns: Path):
     try:
         with open(issns) as fin:
-            return set([i.strip() for i in fin if is_valid_issn(i.strip())])
+            # Um único strip por linha, direto para o set
+            return {issn for line in fin if is_valid_issn(issn := line.strip())}
     except:
         raise ISSNFileError()
 
@@ -1,26 +1,57 @@
+import copy
 import json
+import os
 import re
 from unittest import TestCase, mock
 from datetime import datetime
+from types import SimpleNamespace
 
-import vcr
 import requests
 from xylose import scielodocument
 
-from exporter import AMClient, doaj, config
+from exporter import doaj, config
+
+
+_MIME_TYPE = {
+    "html": "text/html",
+    "pdf": "application/pdf",
+}
+
+
+def setUpModule():
+    # A chave é exigida pelo construtor em quase todos os testes; defini-la
+    # uma vez por módulo evita copiar e restaurar os.environ a cada teste.
+    # mock.patch.dict fica só nos testes que a apagam de propósito
+    os.environ["DOAJ_API_KEY"] = "doaj-api-key-1234"
+
+
+def tearDownModule():
+    os.environ.pop("DOAJ_API_KEY", None)
 
 
 class DOAJExporterXyloseArticleTest(TestCase):
-    @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
+        # O JSON do artigo é lido e interpretado uma única vez por classe;
+        # cada teste recebe uma cópia isolada para poder mutá-la. Como os
+        # testes destas classes não mutam o exportador, a instância também
+        # é construída uma única vez e compartilhada
         with open("tests/fixtures/fake-article.json") as fp:
-            article_json = json.load(fp)
-        self.article = scielodocument.Article(article_json)
-        self.doaj_document = doaj.DOAJExporterXyloseArticle(
-            article=self.article, now=self._fake_utcnow()
+            cls._article_json = json.load(fp)
+        cls._shared_article = scielodocument.Article(
+            copy.deepcopy(cls._article_json)
+        )
+        cls.doaj_document = doaj.DOAJExporterXyloseArticle(
+            article=cls._shared_article, now=cls._fake_utcnow()
         )
 
-    def _fake_utcnow(self):
+    def setUp(self):
+        doaj._fetch_doaj_journal.cache_clear()
+        doaj.DOAJExporterXyloseArticle._issn_cache.clear()
+        self.article = scielodocument.Article(copy.deepcopy(self._article_json))
+
+    @staticmethod
+    def _fake_utcnow():
         return "2021-01-01T00:00:00Z"
 
     def _expected_created_date(self):
@@ -29,6 +60,27 @@ class DOAJExporterXyloseArticleTest(TestCase):
     def _expected_last_updated(self):
         return self._fake_utcnow()
 
+    _expected_bibjson_cache = None
+
+    def _expected_bibjson(self):
+        # O artigo de fixture é o mesmo em todos os testes, então o bibjson
+        # esperado é montado uma única vez por execução da suíte
+        cls = DOAJExporterXyloseArticleTest
+        if cls._expected_bibjson_cache is None:
+            bibjson = {
+                "abstract": self._expected_bibjson_abstract(),
+                "author": self._expected_bibjson_author(),
+                "identifier": self._expected_bibjson_identifier(),
+                "journal": self._expected_bibjson_journal(),
+                "keywords": self._expected_bibjson_keywords(),
+                "link": self._expected_bibjson_link(),
+                "title": self._expected_bibjson_title(),
+            }
+            bibjson["month"], bibjson["year"] = \
+                self._expected_bibjson_month_and_year()
+            cls._expected_bibjson_cache = bibjson
+        return copy.deepcopy(cls._expected_bibjson_cache)
+
     def _expected_bibjson_abstract(self):
         return self.article.original_abstract()
 
@@ -122,18 +174,13 @@ class DOAJExporterXyloseArticleTest(TestCase):
         return keywords.get(self.article.original_language())
 
     def _expected_bibjson_link(self):
-        MIME_TYPE = {
-            "html": "text/html",
-            "pdf": "application/pdf",
-        }
-
         fulltexts = self.article.fulltexts()
         expected = []
         for content_type, links in fulltexts.items():
             for __, url in links.items():
                 expected.append(
                     {
-                        "content_type": MIME_TYPE[content_type],
+                        "content_type": _MIME_TYPE[content_type],
                         "type": "fulltext",
                         "url": url,
                     }
@@ -191,19 +238,9 @@ class PostDOAJExporterXyloseArticleTest(DOAJExporterXyloseArticleTest):
             "id": self.article.data["doaj_id"],
             "created_date": self._expected_created_date(),
             "last_updated": self._expected_last_updated(),
-            "bibjson": {
-                "abstract": self._expected_bibjson_abstract(),
-                "author": self._expected_bibjson_author(),
-                "identifier": self._expected_bibjson_identifier(),
-                "journal": self._expected_bibjson_journal(),
-                "keywords": self._expected_bibjson_keywords(),
-                "link": self._expected_bibjson_link(),
-                "title": self._expected_bibjson_title(),
-            },
+            "bibjson": self._expected_bibjson(),
             "es_type": self.article.document_type,
         }
-        expected["bibjson"]["month"], expected["bibjson"]["year"] = \
-            self._expected_bibjson_month_and_year()
         self.assertEqual(
             expected, self.doaj_document.post_request
         )
@@ -277,19 +314,9 @@ class PutDOAJExporterXyloseArticleTest(DOAJExporterXyloseArticleTest):
             "id": self.article.data["doaj_id"],
             "created_date": "2020-01-01T00:00:00Z",
             "last_updated": self._expected_last_updated(),
-            "bibjson": {
-                "abstract": self._expected_bibjson_abstract(),
-                "author": self._expected_bibjson_author(),
-                "identifier": self._expected_bibjson_identifier(),
-                "journal": self._expected_bibjson_journal(),
-                "keywords": self._expected_bibjson_keywords(),
-                "link": self._expected_bibjson_link(),
-                "title": self._expected_bibjson_title(),
-            },
+            "bibjson": self._expected_bibjson(),
             "es_type": self.article.document_type,
         }
-        expected["bibjson"]["month"], expected["bibjson"]["year"] = \
-            self._expected_bibjson_month_and_year()
         self.assertEqual(
             expected, self.doaj_document.put_request(fake_get_resp)
         )
@@ -315,16 +342,62 @@ class DeleteDOAJExporterXyloseArticleTest(DOAJExporterXyloseArticleTest):
         )
 
 
-@mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
+class PrefetchJournalISSNsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open("tests/fixtures/fake-article.json") as fp:
+            cls._article_json = json.load(fp)
+
+    def setUp(self):
+        doaj._fetch_doaj_journal.cache_clear()
+        self.article = scielodocument.Article(copy.deepcopy(self._article_json))
+        doaj.DOAJExporterXyloseArticle._issn_cache.clear()
+
+    def tearDown(self):
+        doaj.DOAJExporterXyloseArticle._issn_cache.clear()
+
+    @mock.patch("exporter.doaj._session.get")
+    def test_prefetch_journal_issns_caches_registered_issns(self, mk_requests_get):
+        issn = self.article.journal.electronic_issn
+        mock_response = mock.Mock(status_code=200)
+        mock_response.json.return_value = {
+            "results": [{"bibjson": {"eissn": issn}}],
+        }
+        mk_requests_get.return_value = mock_response
+        doaj.DOAJExporterXyloseArticle.prefetch_journal_issns([self.article])
+        self.assertEqual(
+            (issn, "eissn"),
+            doaj.DOAJExporterXyloseArticle._issn_cache.get(issn),
+        )
+
+    @mock.patch("exporter.doaj._session.get")
+    def test_prefetch_journal_issns_ignores_connection_errors(self, mk_requests_get):
+        mk_requests_get.side_effect = requests.ConnectionError
+        doaj.DOAJExporterXyloseArticle.prefetch_journal_issns([self.article])
+        self.assertEqual({}, doaj.DOAJExporterXyloseArticle._issn_cache)
+
+    @mock.patch("exporter.doaj._session.get")
+    def test_get_registered_journal_issn_uses_cache(self, mk_requests_get):
+        issn = self.article.journal.electronic_issn
+        doaj.DOAJExporterXyloseArticle._issn_cache[issn] = (issn, "eissn")
+        doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
+        self.assertEqual((issn, "eissn"), doaj_document._get_registered_journal_issn())
+        mk_requests_get.assert_not_called()
+
+
 class DOAJExporterXyloseArticleExceptionsTestMixin:
-    @mock.patch.dict("os.environ", {"DOAJ_API_URL": ""})
     def test_raises_exception_if_no_post_url(self):
+        # Atribuição direta em vez de mock.patch.dict, que copia e restaura
+        # os.environ inteiro a cada teste
+        os.environ["DOAJ_API_URL"] = ""
+        self.addCleanup(os.environ.pop, "DOAJ_API_URL", None)
         with self.assertRaises(doaj.DOAJExporterXyloseArticleNoRequestData) as exc:
             doaj.DOAJExporterXyloseArticle(article=self.article)
         self.assertEqual("No DOAJ_API_URL set", str(exc.exception))
 
-    @mock.patch.dict("os.environ", {"DOAJ_API_KEY": ""})
     def test_raises_exception_if_no_api_key(self):
+        os.environ["DOAJ_API_KEY"] = ""
+        self.addCleanup(os.environ.update, {"DOAJ_API_KEY": "doaj-api-key-1234"})
         with self.assertRaises(doaj.DOAJExporterXyloseArticleNoRequestData) as exc:
             doaj.DOAJExporterXyloseArticle(article=self.article)
         self.assertEqual("No DOAJ_API_KEY set", str(exc.exception))
@@ -348,6 +421,8 @@ class DOAJExporterXyloseArticleExceptionsTestMixin:
             self.http_request_function()
 
     def test_http_request_has_no_author_affiliation_if_no_affiliation(self):
+        for author_data in self.article.data["article"]["v10"]:
+            author_data.pop("1", None)    # "1": xref da afiliação
         self.doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
         req = self.http_request_function()
         for author in req["bibjson"]["author"]:
@@ -362,6 +437,8 @@ class DOAJExporterXyloseArticleExceptionsTestMixin:
             self.assertIsNone(author.get("orcid_id"))
 
     def test_http_request_has_no_author_orcid_id_if_no_orcid(self):
+        for author_data in self.article.data["article"]["v10"]:
+            author_data.pop("k", None)    # "k": ORCID
         self.doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
         req = self.http_request_function()
         for author in req["bibjson"]["author"]:
@@ -374,30 +451,42 @@ class DOAJExporterXyloseArticleExceptionsTestMixin:
             self.doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
             self.http_request_function()
 
-    @mock.patch("exporter.doaj.requests.get")
+    @mock.patch("exporter.doaj._session.get")
     def test_http_request_send_request_get_with_eissn_and_pissn(self, mk_requests_get):
         mk_requests_get.side_effect = [
-            mock.MagicMock(status_code=404), mock.MagicMock(status_code=200),
+            SimpleNamespace(status_code=404, json=lambda: {"results": []}),
+            SimpleNamespace(
+                status_code=200,
+                json=lambda: {
+                    "results": [{"bibjson": {"eissn": "eissn-registrado"}}]
+                },
+            ),
         ]
 
         self.doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
         self.http_request_function()
         mk_requests_get.assert_has_calls([
             mock.call(
-                f"{self.doaj_document.search_journal_url}{self.article.journal.electronic_issn}"
+                f"{self.doaj_document.search_journal_url}"
+                f"issn:{self.article.journal.electronic_issn}",
+                timeout=doaj._DOAJ_TIMEOUT,
             ),
             mock.call(
-                f"{self.doaj_document.search_journal_url}{self.article.journal.print_issn}"
+                f"{self.doaj_document.search_journal_url}"
+                f"issn:{self.article.journal.print_issn}",
+                timeout=doaj._DOAJ_TIMEOUT,
             ),
         ])
 
-    @mock.patch("exporter.doaj.requests.get")
+    @mock.patch("exporter.doaj._session.get")
     def test_http_request_set_identifier_with_issn_returned_from_doaj_journals_search(
         self, mk_requests_get
     ):
-        MockRequest = mock.Mock(spec=requests.Request, status_code=200)
-        MockRequest.json = mock.Mock(
-            return_value={
+        # Objeto simples em vez de Mock com spec, que introspecta a classe
+        # alvo a cada construção; o código só lê status_code e json()
+        mk_requests_get.return_value = SimpleNamespace(
+            status_code=200,
+            json=lambda: {
                 "results": [
                     {
                         "bibjson": {
@@ -406,9 +495,8 @@ class DOAJExporterXyloseArticleExceptionsTestMixin:
                         },
                     },
                 ],
-            }
+            },
         )
-        mk_requests_get.return_value = MockRequest
         self.doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
         req = self.http_request_function()
         self.assertIn(
@@ -473,7 +561,7 @@ class DOAJExporterXyloseArticleExceptionsTestMixin:
 
     def test_http_request_raises_exception_if_no_doi_nor_fulltexts(self):
         del self.article.data["doi"]
-        del self.article.data["article"]["v237"]    # v237: doi
+        self.article.data["article"].pop("v237", None)    # v237: doi
         with mock.patch.object(self.article, "fulltexts") as mk_fulltexts:
             mk_fulltexts.return_value = {
                 'html': {"pt": ""},
@@ -505,6 +593,8 @@ class DOAJExporterXyloseArticleExceptionsTestMixin:
     def test_http_request_no_month_if_no_article_month(self):
         if self.article.data["article"].get("v223"):    # v223: document publication date
             self.article.data["article"].pop("v223")
+        # A data do fascículo na fixture tem mês; reduz para apenas o ano
+        self.article.data["article"]["v65"] = [{"_": "2009"}]
         self.doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
 
         req = self.http_request_function()
@@ -518,38 +608,50 @@ class DOAJExporterXyloseArticleExceptionsTestMixin:
         self.assertEqual(req["es_type"], "undefined")
 
     def test_error_response_return_empty_str_if_no_error(self):
-        doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
         fake_response = {
           "id": "doaj-1234",
           "location": "",
           "status": "FAIL",
         }
         self.assertEqual(
-            "", doaj_document.error_response(fake_response)
+            "", self.doaj_document.error_response(fake_response)
         )
 
 
-@mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
 class PostDOAJExporterXyloseArticleExceptionsTest(
     DOAJExporterXyloseArticleExceptionsTestMixin, TestCase,
 ):
-    @vcr.use_cassette("tests/fixtures/vcr_cassettes/doaj_exporter.yml")
+    @classmethod
+    def setUpClass(cls):
+        # Fixture local em vez de buscar o documento no ArticleMeta: os
+        # testes só precisam de um artigo com a estrutura esperada
+        with open("tests/fixtures/fake-article.json") as fp:
+            cls._article_json = json.load(fp)
+
     def setUp(self):
-        client = AMClient()
-        self.article = client.document(collection="scl", pid="S0100-19651998000200002")
+        doaj._fetch_doaj_journal.cache_clear()
+        doaj.DOAJExporterXyloseArticle._issn_cache.clear()
+        self.article = scielodocument.Article(copy.deepcopy(self._article_json))
+        # Instância padrão para os testes que não mutam o artigo; os demais
+        # a reconstroem após as mutações
+        self.doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
 
     def http_request_function(self):
         return self.doaj_document.post_request
 
 
-@mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
 class PutDOAJExporterXyloseArticleExceptionsTest(
     DOAJExporterXyloseArticleExceptionsTestMixin, TestCase,
 ):
-    @vcr.use_cassette("tests/fixtures/vcr_cassettes/doaj_exporter.yml")
+    @classmethod
+    def setUpClass(cls):
+        with open("tests/fixtures/fake-article.json") as fp:
+            cls._article_json = json.load(fp)
+
     def setUp(self):
-        client = AMClient()
-        self.article = client.document(collection="scl", pid="S0100-19651998000200002")
+        doaj._fetch_doaj_journal.cache_clear()
+        doaj.DOAJExporterXyloseArticle._issn_cache.clear()
+        self.article = scielodocument.Article(copy.deepcopy(self._article_json))
         self.article.data["doaj_id"] = "doaj-id-123456"
         self.fake_get_resp = {
             "id": self.article.data["doaj_id"],
@@ -568,6 +670,7 @@ class PutDOAJExporterXyloseArticleExceptionsTest(
                 "title": "Article Title",
             },
         }
+        self.doaj_document = doaj.DOAJExporterXyloseArticle(article=self.article)
 
     def http_request_function(self):
         return self.doaj_document.put_request(self.fake_get_resp)
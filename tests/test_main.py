@@ -5,7 +5,7 @@ import shutil
 from unittest import TestCase, mock
 from datetime import datetime, timedelta
 
-import vcr
+import vcr as _vcr
 import articlemeta.client as articlemeta_client
 import requests
 from xylose import scielodocument
@@ -28,6 +28,10 @@ from exporter.main import (
     main_exporter,
 )
 
+# Matcher mínimo: a URI já determina a requisição nos cassettes usados
+# aqui, dispensando os matchers padrão de método, host, caminho e query
+vcr = _vcr.VCR(match_on=["uri"], serializer="yaml")
+
 
 class AMClientTest(TestCase):
     def make_client(self, connection:str=None, domain:str=None) -> AMClient:
@@ -150,7 +154,7 @@ class ExportXyloseArticleExporterAdapterTest(
         self.article = client.document(collection="scl", pid="S0100-19651998000200002")
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_export_calls_requests_post_to_doaj_api_with_doaj_post_request(
         self, mk_requests
     ):
@@ -170,7 +174,7 @@ class ExportXyloseArticleExporterAdapterTest(
             )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_export_raises_exception_with_json_error_if_post_raises_400_http_error(
         self, mk_requests
     ):
@@ -194,7 +198,7 @@ class ExportXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_export_raises_exception_if_post_raises_http_error(self, mk_requests):
         mock_resp = mock.Mock()
         mock_resp.raise_for_status.side_effect = requests.exceptions.HTTPError(
@@ -212,7 +216,7 @@ class ExportXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_export_returns_exporter_post_response(self, mk_requests):
         mk_requests.post.return_value.json.return_value = {
             "id": "doaj-id",
@@ -246,7 +250,7 @@ class UpdateXyloseArticleExporterAdapterTest(
         self.article.data["doaj_id"] = "doaj-id-123456"
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_update_calls_requests_get_to_doaj_api_with_doaj_get_request(
         self, mk_requests
     ):
@@ -262,7 +266,7 @@ class UpdateXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_update_raises_exception_if_get_raises_http_error(self, mk_requests):
         mock_resp = mock.Mock()
         mock_resp.raise_for_status.side_effect = requests.exceptions.HTTPError(
@@ -280,7 +284,7 @@ class UpdateXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     @mock.patch("exporter.main.doaj.DOAJExporterXyloseArticle.put_request")
     def test_update_calls_doaj_put_request_with_doaj_get_response(
         self, mk_put_request, mk_requests,
@@ -304,7 +308,7 @@ class UpdateXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     @mock.patch("exporter.main.doaj.DOAJExporterXyloseArticle.put_request")
     def test_update_calls_requests_put_to_doaj_api_with_doaj_put_request(
         self, mk_put_request, mk_requests,
@@ -332,7 +336,7 @@ class UpdateXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     @mock.patch("exporter.main.doaj.DOAJExporterXyloseArticle.put_request")
     def test_update_raises_exception_with_json_error_if_put_raises_400_http_error(
         self, mk_put_request, mk_requests,
@@ -357,7 +361,7 @@ class UpdateXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     @mock.patch("exporter.main.doaj.DOAJExporterXyloseArticle.put_request")
     def test_update_raises_exception_if_put_raises_http_error(
         self, mk_put_request, mk_requests,
@@ -378,7 +382,7 @@ class UpdateXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     @mock.patch("exporter.main.doaj.DOAJExporterXyloseArticle.put_request")
     def test_update_returns_response(
         self, mk_put_request, mk_requests,
@@ -412,7 +416,7 @@ class GetXyloseArticleExporterAdapterTest(
         self.article.data["doaj_id"] = "doaj-id-123456"
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_get_calls_requests_get_to_doaj_api_with_doaj_get_request(
         self, mk_requests
     ):
@@ -428,7 +432,7 @@ class GetXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_get_raises_exception_if_get_raises_http_error(self, mk_requests):
         mock_resp = mock.Mock()
         mock_resp.raise_for_status.side_effect = requests.exceptions.HTTPError(
@@ -446,7 +450,7 @@ class GetXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_get_returns_response(
         self, mk_requests,
     ):
@@ -480,7 +484,7 @@ class DeleteXyloseArticleExporterAdapterTest(
         self.article.data["doaj_id"] = "doaj-id-123456"
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_delete_calls_requests_delete_to_doaj_api_with_doaj_delete_request(
         self, mk_requests
     ):
@@ -496,7 +500,7 @@ class DeleteXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_delete_raises_exception_if_delete_raises_http_error(self, mk_requests):
         mock_resp = mock.Mock()
         mock_resp.raise_for_status.side_effect = requests.exceptions.HTTPError(
@@ -514,7 +518,7 @@ class DeleteXyloseArticleExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_delete_returns_response(
         self, mk_requests,
     ):
@@ -569,9 +573,22 @@ class PostXyloseArticlesListExporterAdapterTest(
             scielodocument.Article(article_json)
             for article_json in articles_json
         ]
+        # Simula a busca de periódicos no DOAJ para não gerar tráfego real
+        # na pré-busca de ISSNs e isola os caches entre os testes
+        mk_doaj_resp = mock.Mock(status_code=200)
+        mk_doaj_resp.json.return_value = {
+            "results": [{"bibjson": {"eissn": "0001-3765"}}]
+        }
+        doaj_session_patcher = mock.patch.object(
+            doaj._session, "get", return_value=mk_doaj_resp
+        )
+        doaj_session_patcher.start()
+        self.addCleanup(doaj_session_patcher.stop)
+        doaj._fetch_doaj_journal.cache_clear()
+        doaj.DOAJExporterXyloseArticle._issn_cache.clear()
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_export_calls_requests_post_to_doaj_api_with_doaj_post_request(
         self, mk_requests
     ):
@@ -591,7 +608,37 @@ class PostXyloseArticlesListExporterAdapterTest(
             )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
+    def test_export_splits_post_requests_according_to_batch_size(self, mk_requests):
+        mk_requests.post.return_value.json.return_value = [
+            {"id": "doaj-id", "location": "br", "status": "OK"}
+        ]
+        with mock.patch(
+            "exporter.doaj.DOAJExporterXyloseArticle.post_request",
+            new_callable=mock.PropertyMock,
+        ) as mk_post_request:
+            mk_post_request.side_effect = [{"id": doaj_id} for doaj_id in self.doaj_ids]
+            articles_exporter = XyloseArticlesListExporterAdapter(
+                index=self.index,
+                command=self.index_command,
+                articles=set(self.articles),
+                batch_size=1,
+            )
+            articles_exporter.command_function()
+            self.assertEqual(
+                mk_requests.post.call_args_list,
+                [
+                    mock.call(
+                        url=articles_exporter.bulk_articles_url,
+                        params=articles_exporter.params_request,
+                        json=[{"id": doaj_id}],
+                    )
+                    for doaj_id in self.doaj_ids
+                ],
+            )
+
+    @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
+    @mock.patch("exporter.main.session")
     def test_export_raises_exception_with_json_error_if_post_raises_400_http_error(
         self, mk_requests
     ):
@@ -615,7 +662,7 @@ class PostXyloseArticlesListExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_export_raises_exception_if_post_raises_http_error(self, mk_requests):
         mock_resp = mock.Mock()
         mock_resp.raise_for_status.side_effect = requests.exceptions.HTTPError(
@@ -633,7 +680,7 @@ class PostXyloseArticlesListExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_export_returns_exporter_post_response(self, mk_requests):
         mk_requests.post.return_value.json.return_value = [
             {
@@ -677,9 +724,22 @@ class DeleteXyloseArticlesListExporterAdapterTest(
             scielodocument.Article(article_json)
             for article_json in articles_json
         ]
+        # Simula a busca de periódicos no DOAJ para não gerar tráfego real
+        # na pré-busca de ISSNs e isola os caches entre os testes
+        mk_doaj_resp = mock.Mock(status_code=200)
+        mk_doaj_resp.json.return_value = {
+            "results": [{"bibjson": {"eissn": "0001-3765"}}]
+        }
+        doaj_session_patcher = mock.patch.object(
+            doaj._session, "get", return_value=mk_doaj_resp
+        )
+        doaj_session_patcher.start()
+        self.addCleanup(doaj_session_patcher.stop)
+        doaj._fetch_doaj_journal.cache_clear()
+        doaj.DOAJExporterXyloseArticle._issn_cache.clear()
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_delete_request(
         self, mk_requests
     ):
@@ -692,7 +752,30 @@ class DeleteXyloseArticlesListExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
+    def test_delete_splits_delete_requests_according_to_batch_size(self, mk_requests):
+        articles_exporter = XyloseArticlesListExporterAdapter(
+            index=self.index,
+            command=self.index_command,
+            articles=set(self.articles),
+            batch_size=2,
+        )
+        articles_exporter.command_function()
+        delete_request = articles_exporter.delete_request
+        self.assertEqual(
+            mk_requests.delete.call_args_list,
+            [
+                mock.call(
+                    url=articles_exporter.bulk_articles_url,
+                    params=articles_exporter.params_request,
+                    json=delete_request[start:start + 2],
+                )
+                for start in range(0, len(delete_request), 2)
+            ],
+        )
+
+    @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
+    @mock.patch("exporter.main.session")
     def test_delete_calls_requests_delete_to_doaj_api_with_doaj_delete_request(
         self, mk_requests
     ):
@@ -712,7 +795,7 @@ class DeleteXyloseArticlesListExporterAdapterTest(
             )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_delete_raises_exception_if_delete_raises_http_error(self, mk_requests):
         mock_resp = mock.Mock()
         mock_resp.raise_for_status.side_effect = requests.exceptions.HTTPError(
@@ -734,7 +817,7 @@ class DeleteXyloseArticlesListExporterAdapterTest(
         )
 
     @mock.patch.dict("os.environ", {"DOAJ_API_KEY": "doaj-api-key-1234"})
-    @mock.patch("exporter.main.requests")
+    @mock.patch("exporter.main.session")
     def test_delete_returns_exporter_delete_response(self, mk_requests):
         mock_delete_resp = mock.Mock()
         mk_requests.delete.return_value = mock_delete_resp
@@ -742,10 +825,9 @@ class DeleteXyloseArticlesListExporterAdapterTest(
             index=self.index, command=self.index_command, articles=set(self.articles)
         )
         ret = articles_exporter.command_function()
-        for article in self.articles:
-            pid = article.data["code"]
-            with self.subTest(pid=pid):
-                self.assertIn({ "pid": pid, "status": "DELETED" }, ret)
+        expected = {(article.data["code"], "DELETED") for article in self.articles}
+        actual = {(item["pid"], item["status"]) for item in ret}
+        self.assertEqual(expected, actual)
 
 
 class ProcessDocumentTestMixin:
@@ -1276,7 +1358,7 @@ class ArticleMetaParserTest(TestCase):
         ]
         parser = articlemeta_parser(sargs)
         args = parser.parse_args(sargs)
-        self.assertEqual(args.from_date, "01-01-2021")
+        self.assertEqual(args.from_date, datetime(2021, 1, 1))
 
     def test_from_date_and_collection(self):
         sargs = [
@@ -1287,7 +1369,7 @@ class ArticleMetaParserTest(TestCase):
         ]
         parser = articlemeta_parser(sargs)
         args = parser.parse_args(sargs)
-        self.assertEqual(args.from_date, "01-01-2021")
+        self.assertEqual(args.from_date, datetime(2021, 1, 1))
         self.assertEqual(args.collection, "spa")
 
     def test_from_and_until_date(self):
@@ -1299,8 +1381,8 @@ class ArticleMetaParserTest(TestCase):
         ]
         parser = articlemeta_parser(sargs)
         args = parser.parse_args(sargs)
-        self.assertEqual(args.from_date, "01-01-2021")
-        self.assertEqual(args.until_date, "07-01-2021")
+        self.assertEqual(args.from_date, datetime(2021, 1, 1))
+        self.assertEqual(args.until_date, datetime(2021, 1, 7))
 
     def test_from_and_until_date_and_collection(self):
         sargs = [
@@ -1313,8 +1395,8 @@ class ArticleMetaParserTest(TestCase):
         ]
         parser = articlemeta_parser(sargs)
         args = parser.parse_args(sargs)
-        self.assertEqual(args.from_date, "01-01-2021")
-        self.assertEqual(args.until_date, "07-01-2021")
+        self.assertEqual(args.from_date, datetime(2021, 1, 1))
+        self.assertEqual(args.until_date, datetime(2021, 1, 7))
         self.assertEqual(args.collection, "spa")
 
     def test_invalid_until_date_raises_exception(self):
@@ -1335,7 +1417,9 @@ class ArticleMetaParserTest(TestCase):
         ]
         parser = articlemeta_parser(sargs)
         args = parser.parse_args(sargs)
-        self.assertEqual(args.from_date, today.strftime("%d-%m-%Y"))
+        self.assertEqual(
+            args.from_date, datetime(today.year, today.month, today.day)
+        )
 
     def test_future_until_date_is_changed_to_today(self):
         today = datetime.today()
@@ -1346,7 +1430,9 @@ class ArticleMetaParserTest(TestCase):
         ]
         parser = articlemeta_parser(sargs)
         args = parser.parse_args(sargs)
-        self.assertEqual(args.until_date, today.strftime("%d-%m-%Y"))
+        self.assertEqual(
+            args.until_date, datetime(today.year, today.month, today.day)
+        )
 
     def test_collection_and_pid(self):
         sargs = [
@@ -1545,6 +1631,32 @@ class MainExporterTestMixin:
             managed_issns=set(),
         )
 
+    @mock.patch.object(AMClient, "document")
+    def test_process_documents_called_with_max_workers(self, mk_document):
+        main_exporter(
+            [
+                "--output",
+                str(self.output_path),
+                "--workers",
+                "4",
+                self.index,
+                self.index_command,
+                "--collection",
+                "spa",
+                "--pid",
+                "S0100-19651998000200002",
+            ] + self.extra_args
+        )
+        self.mk_process_documents.assert_called_with(
+            get_document=mk_document,
+            index=self.index,
+            index_command=self.index_command,
+            output_path=self.output_path,
+            pids_by_collection={"spa": ["S0100-19651998000200002"]},
+            managed_issns=set(),
+            max_workers=4,
+        )
+
     @mock.patch.object(AMClient, "document")
     def test_process_extracted_documents_called_with_collection_and_pids_from_file(
         self, mk_document
@@ -1585,6 +1697,9 @@ class MainExporterTestMixin:
         mk_documents_identifiers,
         mk_get_valid_datetime,
     ):
+        mk_get_valid_datetime.side_effect = (
+            lambda strdate: datetime.strptime(strdate, "%d-%m-%Y")
+        )
         tests_args = [
             ["--from-date", "01-01-2021",],
             ["--until-date", "02-01-2021",],
@@ -1726,6 +1841,32 @@ class DOAJExportinBulkMainExporterTest(MainExporterTestMixin, TestCase):
     def tearDown(self):
         self.mk_process_documents.stop()
 
+    @mock.patch.object(AMClient, "document")
+    def test_process_documents_in_bulk_called_with_batch_size(self, mk_document):
+        main_exporter(
+            [
+                "--output",
+                str(self.output_path),
+                self.index,
+                self.index_command,
+                "--collection",
+                "spa",
+                "--pid",
+                "S0100-19651998000200002",
+                "--batch-size",
+                "50",
+            ] + self.extra_args
+        )
+        self.mk_process_documents.assert_called_with(
+            get_document=mk_document,
+            index=self.index,
+            index_command=self.index_command,
+            output_path=self.output_path,
+            pids_by_collection={"spa": ["S0100-19651998000200002"]},
+            managed_issns=set(),
+            batch_size=50,
+        )
+
 
 class DOAJUpdateMainExporterTest(MainExporterTestMixin, TestCase):
     index = "doaj"
@@ -1782,3 +1923,29 @@ class DOAJDeleteinBulkMainExporterTest(MainExporterTestMixin, TestCase):
 
     def tearDown(self):
         self.mk_process_documents.stop()
+
+    @mock.patch.object(AMClient, "document")
+    def test_process_documents_in_bulk_called_with_batch_size(self, mk_document):
+        main_exporter(
+            [
+                "--output",
+                str(self.output_path),
+                self.index,
+                self.index_command,
+                "--collection",
+                "spa",
+                "--pid",
+                "S0100-19651998000200002",
+                "--batch-size",
+                "50",
+            ] + self.extra_args
+        )
+        self.mk_process_documents.assert_called_with(
+            get_document=mk_document,
+            index=self.index,
+            index_command=self.index_command,
+            output_path=self.output_path,
+            pids_by_collection={"spa": ["S0100-19651998000200002"]},
+            managed_issns=set(),
+            batch_size=50,
+        )